@@ -11,18 +11,26 @@ Debug HTML saved to debug/<site>/<slug>.html on every fallback trigger.
 """
 from __future__ import annotations
 
+import gzip
 import hashlib
 import json
 import logging
 import os
 import random
 import re
+import threading
 import time
-from datetime import datetime, timedelta, timezone
+import zlib
+from collections import defaultdict
+from functools import lru_cache
 from pathlib import Path
 from typing import Optional
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlparse
 
 import requests as _requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 log = logging.getLogger(__name__)
 
@@ -32,15 +40,17 @@ CACHE_TTL_SEC  = int(os.getenv("CACHE_TTL", str(6 * 3600)))
 DEBUG_NO_CACHE = os.getenv("DEBUG_NO_CACHE", "false").lower() == "true"
 DELAY_MIN      = float(os.getenv("DELAY_MIN", "1.5"))
 DELAY_MAX      = float(os.getenv("DELAY_MAX", "3.0"))
+BACKOFF_CAP    = 10.0   # seconds; ceiling for retry backoff between attempts
+RETRY_AFTER_CAP = 300.0  # seconds; ignore longer server-requested 429 pauses
 
 CACHE_DIR.mkdir(exist_ok=True)
 
 # Denylist: any title matching these (case-insensitive strip) is a placeholder
-TITLE_DENYLIST = {
+TITLE_DENYLIST = frozenset({
     "welcome", "welcome!", "access denied", "just a moment",
     "403", "forbidden", "503", "error", "attention required",
     "checking your browser", "ray id", "",
-}
+})
 
 
 # ── CF block detection ─────────────────────────────────────────────────────────
@@ -67,11 +77,14 @@ def is_placeholder_title(title: str) -> bool:
     return (title or "").strip().lower() in TITLE_DENYLIST
 
 
+_UNSAFE_SLUG_RE = re.compile(r"[^a-z0-9_-]")
+
+
 def save_debug(site: str, slug: str, content: str | bytes):
     """Save raw response to debug/<site>/<slug>.html for later inspection."""
     d = Path("debug") / site
     d.mkdir(parents=True, exist_ok=True)
-    safe = re.sub(r"[^a-z0-9_-]", "_", slug.lower())[:80]
+    safe = _UNSAFE_SLUG_RE.sub("_", slug.lower())[:80]
     fp = d / f"{safe}.html"
     if isinstance(content, bytes):
         fp.write_bytes(content)
@@ -81,21 +94,58 @@ def save_debug(site: str, slug: str, content: str | bytes):
 
 
 # ── Cache helpers ──────────────────────────────────────────────────────────────
+@lru_cache(maxsize=4096)
 def _cache_path(url: str) -> Path:
-    key = hashlib.sha1(url.encode()).hexdigest()
-    return CACHE_DIR / f"{key}.html"
+    # Non-cryptographic use: blake2b is faster than sha1 and 10 bytes is plenty
+    key = hashlib.blake2b(url.encode(), digest_size=10).hexdigest()
+    return CACHE_DIR / f"{key}.html.gz"
 
 def _cache_valid(p: Path) -> bool:
-    if not p.exists():
+    try:
+        mtime = p.stat().st_mtime   # one syscall covers existence and age
+    except OSError:
         return False
-    age = datetime.now(timezone.utc) - datetime.fromtimestamp(p.stat().st_mtime, tz=timezone.utc)
-    return age < timedelta(seconds=CACHE_TTL_SEC)
+    return time.time() - mtime < CACHE_TTL_SEC
 
+# Bodies are gzipped: HTML shrinks ~5x, which keeps the CI cache small for a
+# few ms of CPU per page. An unreadable entry reads as "" and is refetched.
 def _cache_read(p: Path) -> str:
-    return p.read_text(encoding="utf-8", errors="replace")
+    try:
+        return gzip.decompress(p.read_bytes()).decode("utf-8", errors="replace")
+    except (OSError, EOFError, zlib.error):   # BadGzipFile is an OSError
+        return ""
 
 def _cache_write(p: Path, text: str):
-    p.write_text(text, encoding="utf-8")
+    p.write_bytes(gzip.compress(text.encode("utf-8"), compresslevel=5, mtime=0))
+
+# Validators (ETag / Last-Modified) live in a sidecar next to the cached body so
+# a stale entry can be revalidated with a conditional GET instead of re-downloaded.
+def _meta_path(p: Path) -> Path:
+    return p.with_suffix(".meta.json")
+
+def _cache_validators(p: Path) -> dict:
+    """If-None-Match / If-Modified-Since headers for a cached body, if any."""
+    mp = _meta_path(p)
+    if not p.exists() or not mp.exists():
+        return {}
+    try:
+        meta = json.loads(mp.read_text())
+    except Exception:
+        return {}
+    headers = {}
+    if meta.get("etag"):
+        headers["If-None-Match"] = meta["etag"]
+    if meta.get("last_modified"):
+        headers["If-Modified-Since"] = meta["last_modified"]
+    return headers
+
+def _cache_write_meta(p: Path, resp_headers):
+    etag, modified = resp_headers.get("ETag"), resp_headers.get("Last-Modified")
+    mp = _meta_path(p)
+    if etag or modified:
+        mp.write_text(json.dumps({"etag": etag, "last_modified": modified}))
+    elif mp.exists():
+        mp.unlink()
 
 
 # ── Shared request session ─────────────────────────────────────────────────────
@@ -112,9 +162,83 @@ _BASE_HEADERS = {
 _session = _requests.Session()
 _session.headers.update(_BASE_HEADERS)
 
+# Keep-alive connections are reused across fetches. The adapter only retries
+# dropped connections and read errors; every HTTP status (5xx, 429, CF's 503)
+# comes back to the callers' own retry loops, which pace through _throttle and
+# cap Retry-After. urllib3 must not honour Retry-After itself: it would sleep for
+# whatever the server asks before those caps ever see the response.
+_adapter = HTTPAdapter(
+    pool_connections=8,
+    pool_maxsize=16,
+    max_retries=Retry(
+        total=2,
+        connect=2,
+        read=2,
+        status=0,
+        backoff_factor=0.5,
+        allowed_methods=frozenset({"GET", "HEAD"}),
+        respect_retry_after_header=False,
+        raise_on_status=False,
+    ),
+)
+_session.mount("https://", _adapter)
+_session.mount("http://", _adapter)
+
+
+# Per-host pacing: each request to a host is spaced DELAY_MIN..DELAY_MAX after
+# that host's previous request. The first hit on a host goes out immediately and
+# requests to different hosts never wait on each other. A 429 pushes the host's
+# next slot out, so every thread backs off that host, not just the one that hit it.
+_host_next: dict[str, float] = {}
+_host_lock = threading.Lock()
 
-def _sleep():
-    time.sleep(random.uniform(DELAY_MIN, DELAY_MAX))
+
+def _throttle(url: str):
+    host = urlparse(url).netloc
+    with _host_lock:
+        now = time.monotonic()
+        slot = max(now, _host_next.get(host, now))
+        _host_next[host] = slot + random.uniform(DELAY_MIN, DELAY_MAX)
+    if slot > now:
+        time.sleep(slot - now)
+
+
+def _retry_after(resp, default: float) -> float:
+    """
+    Seconds to back off after a 429: the server's Retry-After (delta-seconds or
+    HTTP-date) when present and sane, else the caller's default.
+    """
+    value = resp.headers.get("Retry-After")
+    if not value:
+        return default
+    try:
+        wait = float(value)
+    except ValueError:
+        try:
+            wait = parsedate_to_datetime(value).timestamp() - time.time()
+        except (TypeError, ValueError):
+            return default
+    return min(max(wait, 0.0), RETRY_AFTER_CAP)
+
+
+def _penalise_host(url: str, wait: float):
+    host = urlparse(url).netloc
+    with _host_lock:
+        resume = time.monotonic() + wait
+        if _host_next.get(host, 0.0) < resume:
+            _host_next[host] = resume
+
+
+# Why the last fetch_plain / fetch_cloudscraper call on this thread returned
+# None: True for a CF block or transport error, False for a plain miss (404,
+# 5xx, rate limit). fetch() reads it to decide whether the tier is failing.
+_tier_state = threading.local()
+_BLOCK_STATUSES = frozenset({403, 503})   # how Cloudflare serves challenges
+
+
+def _backoff(attempt: int):
+    """Full-jitter exponential backoff: uniform(0, min(cap, 2**attempt)) seconds."""
+    time.sleep(random.uniform(0, min(BACKOFF_CAP, 2 ** attempt)))
 
 
 # ── Tier 1: plain requests ─────────────────────────────────────────────────────
@@ -131,42 +255,69 @@ def fetch_plain(
     """
     Fetch with plain requests. Returns None if status != 200 or CF blocked.
     Use for APIs and sites without Cloudflare.
+    Expired cache entries are revalidated with a conditional GET when the
+    server sent an ETag or Last-Modified; a 304 reuses the cached body.
     """
     cp = _cache_path(url)
-    if use_cache and not DEBUG_NO_CACHE and _cache_valid(cp):
+    caching = use_cache and not DEBUG_NO_CACHE
+    if caching and _cache_valid(cp):
         content = _cache_read(cp)
         if not is_cf_block(content):
             return content
+    validators = _cache_validators(cp) if caching else {}
+    _tier_state.blocked = False
 
     for attempt in range(1, retries + 1):
-        _sleep()
+        _throttle(url)
         try:
             headers = dict(_BASE_HEADERS)
+            headers.update(validators)
             if extra_headers:
                 headers.update(extra_headers)
             r = _session.get(url, headers=headers, timeout=timeout)
             log.debug(f"[plain] {url} → {r.status_code} ({len(r.content)}B)")
+            if r.status_code == 304 and validators:
+                cached = _cache_read(cp)
+                if not is_cf_block(cached):   # also rejects an empty/bad entry
+                    cp.touch()   # refresh TTL
+                    return cached
+                # The entry we revalidated is unusable; fetch the page in full
+                # as part of this attempt.
+                headers = {k: v for k, v in headers.items() if k not in validators}
+                validators = {}
+                _meta_path(cp).unlink(missing_ok=True)
+                _throttle(url)
+                r = _session.get(url, headers=headers, timeout=timeout)
+                log.debug(f"[plain] {url} → {r.status_code} ({len(r.content)}B)")
             if r.status_code == 200:
                 text = r.text
                 if is_cf_block(text):
+                    # Re-sending the identical plain GET just fetches the same
+                    # challenge page again; hand straight back so fetch() can
+                    # escalate to cloudscraper.
                     save_debug(site, slug or url[-40:], text)
                     log.warning(f"[plain] CF block on attempt {attempt}: {url}")
-                    time.sleep(8 + attempt * 4)
-                    continue
-                if use_cache and not DEBUG_NO_CACHE:
+                    _tier_state.blocked = True
+                    return None
+                if caching:
                     _cache_write(cp, text)
+                    _cache_write_meta(cp, r.headers)
                 return text
             elif r.status_code == 429:
-                wait = 30 + random.uniform(10, 20)
-                log.warning(f"[plain] 429 rate-limit, sleeping {wait:.0f}s")
-                time.sleep(wait)
+                wait = _retry_after(r, 30 + random.uniform(10, 20))
+                log.warning(f"[plain] 429 rate-limit, pausing host {wait:.0f}s")
+                _penalise_host(url, wait)
             elif r.status_code == 404:
                 return None
             else:
                 log.warning(f"[plain] HTTP {r.status_code}: {url}")
+                if r.status_code in _BLOCK_STATUSES:
+                    _tier_state.blocked = True
         except Exception as e:
             log.warning(f"[plain] Error attempt {attempt}: {e}")
-        time.sleep((2 ** attempt) + random.uniform(1, 3))
+            _tier_state.blocked = True
+        if attempt < retries:
+            _backoff(attempt)
     return None
 
 
@@ -179,7 +330,7 @@ def fetch_json(
 ) -> Optional[dict | list]:
     """Fetch JSON from an API endpoint (no CF, no caching by default)."""
     for attempt in range(1, retries + 1):
-        _sleep()
+        _throttle(url)
         try:
             headers = {"Accept": "application/json", **_BASE_HEADERS}
             if extra_headers:
@@ -189,14 +340,15 @@ def fetch_json(
             if r.status_code == 200:
                 return r.json()
             elif r.status_code == 429:
-                time.sleep(30 + random.uniform(10, 20))
+                _penalise_host(url, _retry_after(r, 30 + random.uniform(10, 20)))
             elif r.status_code == 404:
                 return None
             else:
                 log.warning(f"[json] HTTP {r.status_code}: {url}")
         except Exception as e:
             log.warning(f"[json] Error attempt {attempt}: {e}")
-        time.sleep((2 ** attempt) + random.uniform(1, 3))
+        if attempt < retries:
+            _backoff(attempt)
     return None
 
 
@@ -232,51 +384,86 @@ def fetch_cloudscraper(
     """
     Fetch via cloudscraper. Solves Cloudflare JS challenge automatically.
     Works from CI/datacenter IPs for standard CF IUAM protection.
+    Expired cache entries are revalidated the same way as in fetch_plain.
     """
+    _tier_state.blocked = False
     cs = _get_cloudscraper()
     if cs is None:
         return None
 
     cp = _cache_path(url)
-    if use_cache and not DEBUG_NO_CACHE and _cache_valid(cp):
+    caching = use_cache and not DEBUG_NO_CACHE
+    if caching and _cache_valid(cp):
         content = _cache_read(cp)
         if not is_cf_block(content):
             return content
+    validators = _cache_validators(cp) if caching else {}
 
     for attempt in range(1, retries + 1):
-        wait = random.uniform(DELAY_MIN, DELAY_MAX)
-        log.info(f"[cs] GET {url} (attempt {attempt}, sleep {wait:.1f}s)")
-        time.sleep(wait)
+        _throttle(url)
+        log.info(f"[cs] GET {url} (attempt {attempt})")
         try:
-            r = cs.get(url, timeout=35)
+            r = cs.get(url, headers=validators or None, timeout=35)
             log.info(f"[cs] → {r.status_code} ({len(r.content)}B) enc={r.headers.get('Content-Encoding','none')}")
+            if r.status_code == 304 and validators:
+                cached = _cache_read(cp)
+                if not is_cf_block(cached):   # also rejects an empty/bad entry
+                    cp.touch()   # refresh TTL
+                    return cached
+                # The entry we revalidated is unusable; fetch the page in full
+                # as part of this attempt.
+                validators = {}
+                _meta_path(cp).unlink(missing_ok=True)
+                _throttle(url)
+                r = cs.get(url, timeout=35)
+                log.info(f"[cs] → {r.status_code} ({len(r.content)}B) enc={r.headers.get('Content-Encoding','none')}")
             if r.status_code == 200:
                 text = r.text
                 if is_cf_block(text):
                     save_debug(site, slug or url[-40:], text)
                     log.warning(f"[cs] CF still blocking attempt {attempt}")
-                    time.sleep(12 + attempt * 6)
+                    _tier_state.blocked = True
+                    if attempt < retries:
+                        time.sleep(12 + attempt * 6)
                     continue
-                if use_cache and not DEBUG_NO_CACHE:
+                if caching:
                     _cache_write(cp, text)
+                    _cache_write_meta(cp, r.headers)
                 return text
             elif r.status_code == 429:
-                time.sleep(35 + random.uniform(10, 20))
+                _penalise_host(url, _retry_after(r, 35 + random.uniform(10, 20)))
             elif r.status_code == 404:
                 return None
             else:
                 log.warning(f"[cs] HTTP {r.status_code}: {url}")
+                if r.status_code in _BLOCK_STATUSES:
+                    _tier_state.blocked = True
         except Exception as e:
             log.warning(f"[cs] Error attempt {attempt}: {e}")
-        time.sleep((2 ** attempt) + random.uniform(1, 3))
+            _tier_state.blocked = True
+        if attempt < retries:
+            _backoff(attempt)
     return None
 
 
 # ── Tier 3: playwright (full browser fallback) ─────────────────────────────────
 _pw_ctx = None
 _pw_instance = None
+_pw_page = None               # one tab reused for every fetch
+_pw_warm: set[str] = set()   # hosts that have served non-CF pages this session
 STORAGE_STATE_FILE = Path("browser_storage_state.json")
 
+# Only the HTML is used; skip the subresources that make up most page bytes.
+# Scripts and stylesheets still load so CF challenges can run.
+_PW_BLOCKED_TYPES = frozenset({"image", "media", "font"})
+
+
+def _pw_route(route):
+    if route.request.resource_type in _PW_BLOCKED_TYPES:
+        route.abort()
+    else:
+        route.continue_()
+
 
 def _get_playwright_ctx():
     global _pw_ctx, _pw_instance
@@ -303,6 +490,7 @@ def _get_playwright_ctx():
             Object.defineProperty(navigator, 'plugins',   {get: () => [1,2,3,4,5]});
             window.chrome = {runtime: {}};
         """)
+        _pw_ctx.route("**/*", _pw_route)
         log.info("[playwright] Browser context ready")
         return _pw_ctx
     except ImportError:
@@ -313,6 +501,46 @@ def _get_playwright_ctx():
         return None
 
 
+def _share_browser_cookies(ctx, host: str):
+    """
+    Copy the browser's cookies (cf_clearance in particular) into the plain and
+    cloudscraper sessions. Both send the same User-Agent as the browser, so a
+    clearance earned here can let later requests to the host skip the browser.
+    """
+    try:
+        cookies = ctx.cookies()
+    except Exception:
+        return
+    # Create the cloudscraper session now if it doesn't exist yet: it is the
+    # next tier fetch() tries, and a session made later would start cookieless.
+    cs = _get_cloudscraper()
+    jars = [_session.cookies] + ([cs.cookies] if cs is not None else [])
+    for c in cookies:
+        for jar in jars:
+            jar.set(c["name"], c["value"], domain=c["domain"], path=c["path"])
+    if cs is not None and cookies:
+        # Give cloudscraper another chance at this host now that it has them.
+        with _tier_lock:
+            _TIER_FAILS.pop((host, "cs"), None)
+
+
+def _get_playwright_page(ctx):
+    global _pw_page
+    if _pw_page is None or _pw_page.is_closed():
+        _pw_page = ctx.new_page()
+    return _pw_page
+
+
+def _drop_playwright_page():
+    global _pw_page
+    if _pw_page is not None:
+        try:
+            _pw_page.close()
+        except Exception:
+            pass
+    _pw_page = None
+
+
 def fetch_playwright(
     url: str,
     *,
@@ -324,6 +552,9 @@ def fetch_playwright(
     """
     Full browser fetch via Playwright. Last resort for persistent CF blocks.
     Saves storage_state on successful CF solve for reuse.
+    Hosts already cleared this session skip the wait_ms settle delay, and
+    their browser cookies are handed to the cheaper tiers. A single tab is
+    reused across calls; it is only replaced after an error.
     """
     cp = _cache_path(url)
     if use_cache and not DEBUG_NO_CACHE and _cache_valid(cp):
@@ -336,27 +567,40 @@ def fetch_playwright(
         return None
 
     from playwright.sync_api import TimeoutError as PWTimeout
-    page = None
+    host = urlparse(url).netloc
     try:
-        page = ctx.new_page()
+        page = _get_playwright_page(ctx)
         log.info(f"[playwright] GET {url}")
         page.goto(url, wait_until="domcontentloaded", timeout=45_000)
-        page.wait_for_timeout(wait_ms)
+        if host not in _pw_warm:
+            page.wait_for_timeout(wait_ms)
         content = page.content()
-
-        if is_cf_block(content):
-            log.info("[playwright] CF challenge detected, waiting 15s...")
-            time.sleep(15)
-            page.wait_for_load_state("networkidle", timeout=25_000)
-            content = page.content()
-
-        if not is_cf_block(content):
-            # Save storage state (CF clearance cookie) for future runs
-            try:
-                ctx.storage_state(path=str(STORAGE_STATE_FILE))
-                log.info("[playwright] Saved storage state")
-            except Exception:
-                pass
+        blocked = is_cf_block(content)
+
+        if blocked:
+            # Poll instead of a fixed sleep: most challenges clear in a few
+            # seconds and redirect to the real page, whose DOM is all we read.
+            log.info("[playwright] CF challenge detected, polling for clearance...")
+            deadline = time.monotonic() + 30
+            while blocked and time.monotonic() < deadline:
+                page.wait_for_timeout(1000)
+                try:
+                    content = page.content()
+                except Exception:
+                    continue   # mid-redirect; the next poll reads the new page
+                blocked = is_cf_block(content)
+
+        if not blocked:
+            # Save storage state (CF clearance cookie) for future runs; once per
+            # host per session is enough.
+            if host not in _pw_warm:
+                _pw_warm.add(host)
+                try:
+                    ctx.storage_state(path=str(STORAGE_STATE_FILE))
+                    log.info("[playwright] Saved storage state")
+                except Exception:
+                    pass
+                _share_browser_cookies(ctx, host)
             if use_cache and not DEBUG_NO_CACHE:
                 _cache_write(cp, content)
             return content
@@ -367,20 +611,18 @@ def fetch_playwright(
 
     except PWTimeout:
         log.warning(f"[playwright] Timeout: {url}")
+        _drop_playwright_page()
         return None
     except Exception as e:
         log.warning(f"[playwright] Error: {e}")
+        _drop_playwright_page()
         return None
-    finally:
-        if page:
-            try:
-                page.close()
-            except Exception:
-                pass
 
 
 def playwright_stop():
     global _pw_ctx, _pw_instance
+    _pw_warm.clear()
+    _drop_playwright_page()
     try:
         if _pw_ctx:
             _pw_ctx.close()
@@ -393,6 +635,29 @@ def playwright_stop():
 
 
 # ── Auto-tiered fetch (plain → cloudscraper → playwright) ─────────────────────
+# Per-host tier outcomes for this run. Once a tier has been blocked twice for a
+# host without ever succeeding, fetch() starts that host at the next tier
+# instead of paying for requests we already know will be blocked. Only CF blocks
+# and transport errors count against a tier; a 404 or other plain miss says
+# nothing about whether the tier can get through.
+_TIER_OK:    dict[tuple[str, str], int] = defaultdict(int)
+_TIER_FAILS: dict[tuple[str, str], int] = defaultdict(int)
+_tier_lock = threading.Lock()
+
+
+def _tier_record(host: str, tier: str, ok: bool, blocked: bool):
+    with _tier_lock:
+        if ok:
+            _TIER_OK[host, tier] += 1
+        elif blocked:
+            _TIER_FAILS[host, tier] += 1
+
+
+def _tier_dead(host: str, tier: str) -> bool:
+    with _tier_lock:
+        return _TIER_FAILS[host, tier] >= 2 and _TIER_OK[host, tier] == 0
+
+
 def fetch(
     url: str,
     *,
@@ -406,19 +671,25 @@ def fetch(
     Auto-tiered fetch. Tries cheaper tiers first, escalates on CF block.
     - prefer_cs=True: skip plain requests, start with cloudscraper
     - force_playwright=True: go straight to playwright (for known hard blocks)
+    Tiers that keep failing for a host are skipped for the rest of the run.
     """
     if force_playwright:
         return fetch_playwright(url, site=site, slug=slug, use_cache=use_cache)
 
-    if not prefer_cs:
+    host = urlparse(url).netloc
+
+    if not prefer_cs and not _tier_dead(host, "plain"):
         result = fetch_plain(url, site=site, slug=slug, use_cache=use_cache)
+        _tier_record(host, "plain", result is not None, _tier_state.blocked)
         if result is not None:
             return result
         log.info(f"[fetch] Plain failed, escalating to cloudscraper: {url}")
 
-    result = fetch_cloudscraper(url, site=site, slug=slug, use_cache=use_cache)
-    if result is not None:
-        return result
+    if not _tier_dead(host, "cs"):
+        result = fetch_cloudscraper(url, site=site, slug=slug, use_cache=use_cache)
+        _tier_record(host, "cs", result is not None, _tier_state.blocked)
+        if result is not None:
+            return result
 
     log.info(f"[fetch] Cloudscraper failed, escalating to playwright: {url}")
     return fetch_playwright(url, site=site, slug=slug, use_cache=use_cache)
@@ -22,9 +22,15 @@ from __future__ import annotations
 
 import json
 import logging
+import os
 from datetime import datetime, timezone
 from pathlib import Path
 
+try:
+    import orjson
+except ImportError:  # optional: stdlib json is the fallback
+    orjson = None
+
 log = logging.getLogger(__name__)
 
 OUT_FILE    = Path("albums.json")
@@ -32,26 +38,88 @@ RECHECK_FILE = Path("recheck.json")
 VALIDATION_FILE = Path("validation.json")
 
 # Titles that indicate a blocked / challenge page was parsed by mistake
-PLACEHOLDER_TITLES = {
+PLACEHOLDER_TITLES = frozenset({
     "", "welcome", "welcome!", "access denied", "just a moment",
     "403", "forbidden", "503", "error", "attention required",
     "checking your browser", "ray id", "untitled",
-}
+})
 
 
 def is_placeholder(record: dict) -> bool:
     t = (record.get("title") or "").strip().lower()
-    return t in PLACEHOLDER_TITLES or len(t) < 2
+    return len(t) < 2 or t in PLACEHOLDER_TITLES
 
 
 def now_iso() -> str:
     return datetime.now(timezone.utc).isoformat()
 
 
+def _loads(data: bytes):
+    return orjson.loads(data) if orjson else json.loads(data)
+
+
+def _dumps(obj) -> bytes:
+    """
+    UTF-8 JSON with 2-space indent. For the strings, ints, bools, nulls, lists
+    and dicts albums hold, both backends write the same bytes; floats can differ
+    in exponent form (orjson 1e16, json 1e+16). Anything orjson refuses (ints
+    beyond 64 bits) goes through stdlib json instead of failing the save.
+    """
+    if orjson:
+        try:
+            return orjson.dumps(
+                obj, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS
+            )
+        except TypeError:   # orjson.JSONEncodeError subclasses TypeError
+            pass
+    return json.dumps(obj, ensure_ascii=False, indent=2).encode("utf-8")
+
+
+def _write_atomic(path: Path, data: bytes):
+    """Write via a temp file + rename so readers never see a half-written file."""
+    tmp = path.with_name(path.name + ".tmp")
+    tmp.write_bytes(data)
+    os.replace(tmp, path)
+
+
+# albums.json is {"meta": ..., "albums": [...]}; the album list is serialised
+# on its own and spliced in, so save() can both compare it with the file on disk
+# and write the payload without dumping the albums twice.
+_ALBUMS_SEP = b',\n  "albums": '
+
+
+def _nest(data: bytes) -> bytes:
+    """Re-indent a top-level _dumps() value to sit one level inside an object."""
+    return data.replace(b"\n", b"\n  ")   # JSON strings never hold a raw newline
+
+
+def _dumps_payload(meta: dict, albums_json: bytes) -> bytes:
+    """Same bytes as _dumps({"meta": meta, "albums": albums})."""
+    return (
+        b'{\n  "meta": ' + _nest(_dumps(meta))
+        + _ALBUMS_SEP + _nest(albums_json) + b"\n}"
+    )
+
+
+def _saved_meta(albums_json: bytes) -> dict | None:
+    """Meta of albums.json on disk, if its album list is exactly albums_json."""
+    try:
+        data = OUT_FILE.read_bytes()
+    except OSError:
+        return None
+    head, sep, tail = data.partition(_ALBUMS_SEP)
+    if not sep or tail != _nest(albums_json) + b"\n}":
+        return None
+    try:
+        return _loads(head + b"\n}")["meta"]
+    except Exception:
+        return None
+
+
 def load_existing() -> dict[str, dict]:
     if OUT_FILE.exists():
         try:
-            data = json.loads(OUT_FILE.read_text())
+            data = _loads(OUT_FILE.read_bytes())
             existing = {a["id"]: a for a in data.get("albums", [])}
             log.info(f"Loaded {len(existing)} existing records")
             return existing
@@ -60,42 +128,61 @@ def load_existing() -> dict[str, dict]:
     return {}
 
 
+def _sort_key(album: dict) -> str:
+    return album.get("date") or album.get("indexed_at") or ""
+
+
 def save(albums_by_id: dict[str, dict], new_count: int):
-    albums = sorted(
-        albums_by_id.values(),
-        key=lambda a: a.get("date") or a.get("indexed_at") or "",
-        reverse=True,
-    )
-    placeholder_count = sum(1 for a in albums if is_placeholder(a))
-    recheck_count = sum(1 for a in albums if a.get("needs_recheck"))
-
-    payload = {
-        "meta": {
-            "total":             len(albums),
-            "last_updated":      now_iso(),
-            "new_this_run":      new_count,
-            "placeholder_count": placeholder_count,
-            "recheck_count":     recheck_count,
-            "sources":           sorted({a.get("source", "?") for a in albums}),
-        },
-        "albums": albums,
+    # load_existing() keeps albums.json's saved newest-first order, so this is
+    # one sorted run plus the records added this run; Timsort merges that in
+    # near-linear time, no separate sorted container needed.
+    albums = list(albums_by_id.values())
+    albums.sort(key=_sort_key, reverse=True)
+
+    # One pass for every aggregate instead of a generator walk per figure
+    placeholder_count = 0
+    sources = set()
+    recheck = []
+    for a in albums:
+        if is_placeholder(a):
+            placeholder_count += 1
+        if a.get("needs_recheck"):
+            recheck.append(a)
+        sources.add(a.get("source", "?"))
+    recheck_count = len(recheck)
+
+    meta = {
+        "total":             len(albums),
+        "last_updated":      now_iso(),
+        "new_this_run":      new_count,
+        "placeholder_count": placeholder_count,
+        "recheck_count":     recheck_count,
+        "sources":           sorted(sources),
     }
-    OUT_FILE.write_text(json.dumps(payload, ensure_ascii=False, indent=2))
+    albums_json = _dumps(albums)
+
+    # Skip the rewrite when the file on disk already holds these albums and
+    # meta, bar the run timestamp; the file then keeps (and reports) its own.
+    saved = _saved_meta(albums_json) if RECHECK_FILE.exists() else None
+    if saved is not None and saved == {**meta, "last_updated": saved.get("last_updated")}:
+        log.info(f"✓ albums.json unchanged ({len(albums)} albums), not rewritten")
+        return saved
+
+    _write_atomic(OUT_FILE, _dumps_payload(meta, albums_json))
     log.info(
         f"✓ Saved {len(albums)} albums "
         f"({new_count} new, {placeholder_count} placeholders, {recheck_count} recheck)"
     )
 
     # Save recheck queue separately
-    recheck = [a for a in albums if a.get("needs_recheck")]
-    RECHECK_FILE.write_text(json.dumps(recheck, ensure_ascii=False, indent=2))
+    _write_atomic(RECHECK_FILE, _dumps(recheck))
 
-    return payload["meta"]
+    return meta
 
 
 def write_validation(meta: dict, extra: dict | None = None):
     v = {**meta, **(extra or {})}
-    VALIDATION_FILE.write_text(json.dumps(v, ensure_ascii=False, indent=2))
+    _write_atomic(VALIDATION_FILE, _dumps(v))
     log.info(f"✓ Wrote validation.json")
 
 
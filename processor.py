@@ -3,6 +3,12 @@ import json
 import logging
 from glob import glob
 from datetime import datetime, timezone
+from functools import lru_cache
+
+try:
+    import orjson
+except ImportError:  # optional: stdlib json is the fallback
+    orjson = None
 
 DATA_DIR = "data"
 OUTPUT_DIR = "docs"
@@ -14,6 +20,8 @@ handler = logging.StreamHandler()
 handler.setFormatter(logging.Formatter("[%(levelname)s] %(message)s"))
 logger.addHandler(handler)
 
+_loads = orjson.loads if orjson is not None else json.loads
+
 
 # -----------------------------------------------------------------------------
 # Validation
@@ -66,11 +74,26 @@ def make_key(entry: dict):
 
 def parse_date(date_str: str):
     try:
-        return datetime.strptime(date_str, "%Y-%m-%d")
-    except Exception:
+        return _parse_day(date_str)
+    except Exception:   # includes unhashable values from malformed lines
         return datetime.min
 
 
+@lru_cache(maxsize=1024)
+def _parse_day(date_str: str):
+    # A run stamps every entry with the same few dates, so the cache turns
+    # nearly every call into a lookup. fromisoformat handles the plain
+    # YYYY-MM-DD form far faster than strptime, but also accepts shapes
+    # strptime rejects (e.g. week dates), so it only sees exact YYYY-MM-DD.
+    if (
+        len(date_str) == 10 and date_str.isascii()
+        and date_str[4] == date_str[7] == "-"
+        and (date_str[:4] + date_str[5:7] + date_str[8:]).isdigit()
+    ):
+        return datetime.fromisoformat(date_str)
+    return datetime.strptime(date_str, "%Y-%m-%d")
+
+
 # -----------------------------------------------------------------------------
 # Processor
 # -----------------------------------------------------------------------------
@@ -100,12 +123,13 @@ def run():
     for filepath in files:
         logger.info(f"Processing {filepath}")
 
-        with open(filepath, "r", encoding="utf-8") as f:
+        # Lines stay as bytes; both parsers take UTF-8 bytes directly
+        with open(filepath, "rb") as f:
             for line in f:
                 total_lines += 1
 
                 try:
-                    entry = json.loads(line.strip())
+                    entry = _loads(line.strip())
                 except json.JSONDecodeError:
                     logger.warning("Invalid JSON line skipped")
                     continue
@@ -115,18 +139,17 @@ def run():
                     continue
 
                 key = make_key(entry)
+                updated = parse_date(entry["last_updated"])
 
-                if key not in deduped:
-                    deduped[key] = entry
-                else:
+                # Store the parsed date with the entry so each line is parsed once
+                kept = deduped.setdefault(key, (updated, entry))
+                if kept[1] is not entry and updated > kept[0]:
                     # Keep most recent last_updated
-                    existing = deduped[key]
-                    if parse_date(entry["last_updated"]) > parse_date(existing["last_updated"]):
-                        deduped[key] = entry
+                    deduped[key] = (updated, entry)
 
                 valid_entries += 1
 
-    flattened = list(deduped.values())
+    flattened = [entry for _, entry in deduped.values()]
 
     output_payload = {
         "generated_at": datetime.now(timezone.utc).strftime("%Y-%m-%d"),
@@ -134,8 +157,14 @@ def run():
         "entries": flattened,
     }
 
-    with open(OUTPUT_FILE, "w", encoding="utf-8") as out:
+    # Write beside the target and rename over it, so the published index is
+    # never left truncated if the run dies mid-write. Always stdlib json here:
+    # orjson can't emit the ", "/": " separators the published file uses, and
+    # its bytes must not depend on which backend is installed.
+    tmp_file = OUTPUT_FILE + ".tmp"
+    with open(tmp_file, "w", encoding="utf-8") as out:
         json.dump(output_payload, out, ensure_ascii=False)
+    os.replace(tmp_file, OUTPUT_FILE)
 
     logger.info(f"Processor complete")
     logger.info(f"Total lines read: {total_lines}")
@@ -3,15 +3,21 @@ import os
 import re
 import time
 import random
+import threading
 import cloudscraper
+import lxml  # noqa: F401  -- bs4 only raises FeatureNotFound at the first parse
 from bs4 import BeautifulSoup
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
 from datetime import datetime, timezone
 
 # -----------------------------------------------------------------------------
 # Config
 # -----------------------------------------------------------------------------
 
-BASE_URL = "https://www.eporner.com/pornstar-list/"
+SITE_URL = "https://www.eporner.com"
+BASE_URL = f"{SITE_URL}/pornstar-list/"
 OUTPUT_FILE = "data/eporner.jl"
 
 AGE_GATE_COOKIES = {"age_verified": "1", "bs": "1"}
@@ -25,6 +31,7 @@ USER_AGENTS = [
 MAX_RETRIES = 4
 BASE_DELAY = 2.0
 RETRY_BACKOFF = 3.0
+PAGE_WORKERS = 4
 
 
 # -----------------------------------------------------------------------------
@@ -44,14 +51,24 @@ def fetch(url, scraper, retries=MAX_RETRIES):
     """
     for attempt in range(1, retries + 1):
         try:
-            scraper.headers.update({"User-Agent": random.choice(USER_AGENTS)})
-            r = scraper.get(url, cookies=AGE_GATE_COOKIES, timeout=30)
+            # Per-request UA: the session's own headers are never mutated
+            r = scraper.get(
+                url,
+                headers={"User-Agent": random.choice(USER_AGENTS)},
+                cookies=AGE_GATE_COOKIES,
+                timeout=30,
+            )
 
             if r.status_code == 200:
-                if "Want to watch FREE porn" in r.text[:500]:
+                # Raw bytes rather than r.text: bs4's EncodingDetector picks
+                # the charset from the BOM / <meta> declaration and lxml decodes
+                # with it, so requests never runs its own charset guess over
+                # the whole body.
+                body = r.content
+                if b"Want to watch FREE porn" in body[:500]:
                     print(f"[WARN] Age gate hit on attempt {attempt} for {url}")
                 else:
-                    return BeautifulSoup(r.text, "html.parser")
+                    return BeautifulSoup(body, "lxml")
 
             elif r.status_code == 429:
                 wait = RETRY_BACKOFF * (2 ** attempt)
@@ -82,6 +99,9 @@ def fetch(url, scraper, retries=MAX_RETRIES):
 # Pagination
 # -----------------------------------------------------------------------------
 
+PAGE_NUM_RE = re.compile(r"/pornstar-list/(\d+)/")
+
+
 def get_total_pages(scraper):
     print("[INFO] Detecting total pages...")
 
@@ -93,8 +113,8 @@ def get_total_pages(scraper):
             continue
 
         pages = []
-        for link in soup.find_all("a", href=True):
-            match = re.search(r"/pornstar-list/(\d+)/", link["href"])
+        for link in soup.select('a[href*="/pornstar-list/"]'):
+            match = PAGE_NUM_RE.search(link["href"])
             if match:
                 pages.append(int(match.group(1)))
 
@@ -114,26 +134,56 @@ def get_total_pages(scraper):
 # Parsing
 # -----------------------------------------------------------------------------
 
+COUNTS_RE = re.compile(r"([\d,]+)\s*(Videos?|Photos?)", re.I)
+PROFILE_HREF_RE = re.compile(r"/pornstar/[^/]+/$")
+VIDEOS_HINT_RE = re.compile(r"\d+\s*Videos?", re.I)
+
+
 def parse_counts(text):
-    vid_match = re.search(r"([\d,]+)\s*Videos?", text, re.I)
-    img_match = re.search(r"([\d,]+)\s*Photos?", text, re.I)
-    videos = int(vid_match.group(1).replace(",", "")) if vid_match else 0
-    images = int(img_match.group(1).replace(",", "")) if img_match else 0
-    return videos, images
+    """
+    Single pass over text; the first "N Videos" and first "N Photos" win.
+    """
+    videos = images = None
+    for match in COUNTS_RE.finditer(text):
+        count = int(match.group(1).replace(",", ""))
+        if match.group(2)[0] in "Vv":
+            if videos is None:
+                videos = count
+        elif images is None:
+            images = count
+        if videos is not None and images is not None:
+            break
+    return videos or 0, images or 0
+
+
+def node_text(node, text_cache):
+    """get_text for node, memoised per page by node identity."""
+    key = id(node)
+    text = text_cache.get(key)
+    if text is None:
+        text = text_cache[key] = node.get_text(" ", strip=True)
+    return text
 
 
-def extract_stats(link, soup, display_name):
+def extract_stats(link, soup, display_name, text_cache=None):
     """
     Try multiple strategies to find video/photo counts.
     Returns (videos, images).
+
+    text_cache is a per-page dict shared by every link on the page so shared
+    ancestors (grid rows, the list container) and the full-page text are only
+    serialised once.
     """
+    if text_cache is None:
+        text_cache = {}
+
     # Strategy 1: Walk up DOM
     container = link.parent
     for _ in range(6):
         if container is None:
             break
-        text = container.get_text(" ", strip=True)
-        if re.search(r"\d+\s*Videos?", text, re.I):
+        text = node_text(container, text_cache)
+        if VIDEOS_HINT_RE.search(text):
             return parse_counts(text)
         container = container.parent
 
@@ -141,32 +191,51 @@ def extract_stats(link, soup, display_name):
     if link.parent:
         for sibling in link.parent.next_siblings:
             try:
-                sib_text = sibling.get_text(" ", strip=True)
-                if re.search(r"\d+\s*Videos?", sib_text, re.I):
+                sib_text = node_text(sibling, text_cache)
+                if VIDEOS_HINT_RE.search(sib_text):
                     return parse_counts(sib_text)
             except AttributeError:
                 continue
 
     # Strategy 3: Full page text context around the name
-    full_text = soup.get_text(" ")
-    escaped = re.escape(display_name)
-    context_match = re.search(escaped + r".{0,300}", full_text, re.I | re.DOTALL)
-    if context_match:
-        snippet = context_match.group(0)
-        if re.search(r"\d+\s*Videos?", snippet, re.I):
+    # Lowercased text + str.find instead of a per-name IGNORECASE/DOTALL regex;
+    # parse_counts is case-insensitive so the lowered snippet parses the same.
+    full_text = text_cache.get("page")
+    if full_text is None:
+        full_text = text_cache["page"] = soup.get_text(" ").lower()
+    name = display_name.lower()
+    start = full_text.find(name)
+    if start >= 0:
+        snippet = full_text[start:start + len(name) + 300]
+        if VIDEOS_HINT_RE.search(snippet):
             return parse_counts(snippet)
 
     return 0, 0
 
 
-def parse_page(soup, page_number):
+def parse_page(soup, page_number, last_updated=None, seen_urls=None):
     """
     Extract all model profiles from a listing page.
     Returns list of dicts conforming to the shared entry schema.
+
+    last_updated is the run date shared by every entry; computed here
+    only when the caller does not pass one.
+
+    seen_urls may be shared across pages so profiles repeated on a later
+    page (or a page served twice) are skipped before their stats are parsed.
     """
+    if last_updated is None:
+        last_updated = datetime.now(timezone.utc).strftime("%Y-%m-%d")
+    if seen_urls is None:
+        seen_urls = set()
+
     models = []
-    seen_urls = set()
-    links = soup.find_all("a", href=re.compile(r"/pornstar/[^/]+/$"))
+    text_cache = {}
+    # soupsieve narrows to candidate anchors; the regex only sees those hrefs
+    links = [
+        a for a in soup.select('a[href*="/pornstar/"]')
+        if PROFILE_HREF_RE.search(a["href"])
+    ]
 
     # DEBUG: log raw container text for first model on page 1
     if page_number == 1 and links:
@@ -176,7 +245,7 @@ def parse_page(soup, page_number):
             if c is None:
                 break
             t = c.get_text(" ", strip=True)
-            if re.search(r"\d+\s*Videos?", t, re.I):
+            if VIDEOS_HINT_RE.search(t):
                 print(f"[DEBUG] First model container text: {t[:400]}")
                 break
             c = c.parent
@@ -189,12 +258,12 @@ def parse_page(soup, page_number):
             if not display_name:
                 continue
 
-            profile_url = "https://www.eporner.com" + link["href"]
+            profile_url = SITE_URL + link["href"]
             if profile_url in seen_urls:
                 continue
             seen_urls.add(profile_url)
 
-            videos, images = extract_stats(link, soup, display_name)
+            videos, images = extract_stats(link, soup, display_name, text_cache)
 
             models.append({
                 "normalized_name": display_name.strip().lower(),
@@ -207,7 +276,7 @@ def parse_page(soup, page_number):
                     "total": videos + images,
                 },
                 "url": profile_url,
-                "last_updated": datetime.now(timezone.utc).strftime("%Y-%m-%d"),
+                "last_updated": last_updated,
             })
 
         except Exception as e:
@@ -226,28 +295,51 @@ def run():
     os.makedirs("data", exist_ok=True)
 
     scraper = make_scraper()
+    run_date = datetime.now(timezone.utc).strftime("%Y-%m-%d")
     total_pages, page1_soup = get_total_pages(scraper)
     all_models = []
+    seen_urls = set()
+    # cloudscraper sessions (and their CF challenge state) aren't thread-safe,
+    # so each worker thread gets its own.
+    worker = threading.local()
 
-    for page in range(1, total_pages + 1):
+    def load_page(page):
         if page == 1 and page1_soup is not None:
-            soup = page1_soup
             print(f"[INFO] Using cached page 1 soup")
-        else:
-            url = f"{BASE_URL}{page}/"
-            print(f"[INFO] Fetching page {page}/{total_pages}: {url}")
-            soup = fetch(url, scraper)
+            return page1_soup
+        if not hasattr(worker, "scraper"):
+            worker.scraper = make_scraper()
+        # Each worker waits before its own request, so a slow page only
+        # delays its own worker instead of holding back a whole batch.
+        time.sleep(BASE_DELAY + random.uniform(0.5, 1.5))
+        url = f"{BASE_URL}{page}/"
+        print(f"[INFO] Fetching page {page}/{total_pages}: {url}")
+        return fetch(url, worker.scraper)
+
+    # Pages stream through PAGE_WORKERS threads, each with its own session;
+    # results are consumed in page order so the output order is unchanged.
+    # At most 2 * PAGE_WORKERS pages are in flight, so finished soups waiting
+    # behind a slow page can't pile up, and each tree is freed once parsed.
+    pages = iter(range(1, total_pages + 1))
+    with ThreadPoolExecutor(max_workers=PAGE_WORKERS) as pool:
+        pending = deque(
+            (page, pool.submit(load_page, page))
+            for page in islice(pages, 2 * PAGE_WORKERS)
+        )
+        while pending:
+            page, future = pending.popleft()
+            for nxt in islice(pages, 1):
+                pending.append((nxt, pool.submit(load_page, nxt)))
+
+            soup = future.result()
             if soup is None:
                 print(f"[WARN] Skipping page {page} after all retries failed")
                 continue
 
-        models = parse_page(soup, page)
-        print(f"[INFO] → {len(models)} models on page {page}/{total_pages}")
-        all_models.extend(models)
-
-        if page < total_pages:
-            delay = BASE_DELAY + random.uniform(0.5, 1.5)
-            time.sleep(delay)
+            models = parse_page(soup, page, run_date, seen_urls)
+            soup.decompose()
+            print(f"[INFO] → {len(models)} models on page {page}/{total_pages}")
+            all_models.extend(models)
 
     print(f"[INFO] Total models scraped: {len(all_models)}")
 
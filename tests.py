@@ -36,6 +36,214 @@ def check(name: str, condition: bool, detail: str = ""):
     return condition
 
 
+# The sections up to PROCESSOR import only modules this tree ships, so they run
+# first; the per-site parser sections after them need their own scrapers.
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# EPORNER LISTING TESTS
+# ═══════════════════════════════════════════════════════════════════════════════
+print("\n── Eporner listing ──")
+
+from scrapers.eporner import parse_counts
+
+check("eporner: counts videos+photos", parse_counts("1,204 Videos 36 Photos") == (1204, 36))
+check("eporner: counts case-insensitive", parse_counts("12 videos") == (12, 0))
+check("eporner: first count of each kind wins", parse_counts("5 Photos 7 Video 9 Videos") == (7, 5))
+
+from bs4 import BeautifulSoup
+from scrapers.eporner import parse_page
+
+# Listing page: counts beside the link's wrapper, and one profile nested too deep
+# for the ancestor walk, so only the page text around its name has the counts
+EPORNER_LISTING = """
+<html><body>
+<div class="mbprofile">
+  <div class="mbtit"><a href="/pornstar/anna-lee/">Anna Lee</a></div>
+  <div class="mbstats"><span>1,204 Videos</span> <span>36 Photos</span></div>
+</div>
+<div><div><div><div><div><div><div>
+  <a href="/pornstar/renee-odegard/">Renée Ødegård</a>
+</div></div></div></div></div></div></div>
+<p>Renée Ødegård 58 Videos 7 Photos</p>
+<a href="/pornstar/anna-lee/videos/">Not a profile link</a>
+</body></html>
+"""
+_seen = set()
+ep = parse_page(BeautifulSoup(EPORNER_LISTING, "lxml"), 2, "2024-01-01", _seen)
+epm = {m["display_name"]: m for m in ep}
+check("eporner: finds 2 profiles (not sub-pages)", len(ep) == 2, f"got {len(ep)}")
+check("eporner: counts from the wrapper's sibling",
+      epm.get("Anna Lee", {}).get("media") == {"videos": 1204, "images": 36, "total": 1240})
+check("eporner: counts from page text near the name",
+      epm.get("Renée Ødegård", {}).get("media") == {"videos": 58, "images": 7, "total": 65})
+check("eporner: non-ASCII name normalised",
+      epm.get("Renée Ødegård", {}).get("normalized_name") == "renée ødegård")
+check("eporner: profile url absolute",
+      epm.get("Anna Lee", {}).get("url") == "https://www.eporner.com/pornstar/anna-lee/")
+ep2 = parse_page(BeautifulSoup(EPORNER_LISTING, "lxml"), 3, "2024-01-01", _seen)
+check("eporner: seen_urls skips profiles already parsed", len(ep2) == 0, f"got {len(ep2)}")
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# INDEX STORAGE TESTS
+# ═══════════════════════════════════════════════════════════════════════════════
+print("\n── Index storage ──")
+
+# Save/load round-trip (orjson when installed, stdlib json otherwise)
+import tempfile
+import index as index_mod
+
+_tmp = Path(tempfile.mkdtemp())
+index_mod.OUT_FILE = _tmp / "albums.json"
+index_mod.RECHECK_FILE = _tmp / "recheck.json"
+saved = {
+    "a:1": {"id": "a:1", "title": "Older Pack", "date": "2024-01-01", "source": "a"},
+    "a:2": {"id": "a:2", "title": "Newer Pack ü", "date": "2024-02-01", "source": "a"},
+}
+meta = index_mod.save(saved, 1)
+loaded = index_mod.load_existing()
+check("index: save/load round-trip", loaded == saved)
+check("index: saved newest first", list(loaded) == ["a:2", "a:1"])
+check("index: meta total", meta["total"] == 2)
+_before = index_mod.OUT_FILE.stat().st_mtime_ns
+meta2 = index_mod.save(saved, 1)
+check("index: unchanged save skips rewrite",
+      index_mod.OUT_FILE.stat().st_mtime_ns == _before)
+check("index: skipped save reports the on-disk meta",
+      meta2 == json.loads(index_mod.OUT_FILE.read_text())["meta"])
+saved["a:1"]["title"] = "Older Pack v2"
+index_mod.save(saved, 0)
+check("index: changed save rewrites",
+      index_mod.load_existing()["a:1"]["title"] == "Older Pack v2")
+# A hand-edited (or restored) albums.json is rewritten, not trusted
+index_mod.OUT_FILE.write_text(index_mod.OUT_FILE.read_text().replace("Pack v2", "Pack v3"))
+index_mod.save(saved, 0)
+check("index: edited file is rewritten",
+      index_mod.load_existing()["a:1"]["title"] == "Older Pack v2")
+
+# Spliced payload matches a whole-payload dump on both JSON backends
+_orjson = index_mod.orjson
+for index_mod.orjson in {_orjson, None}:
+    for _albums in (list(saved.values()), []):
+        _meta = {"total": len(_albums), "sources": ["a"]}
+        check(f"index: payload splice matches ({'orjson' if index_mod.orjson else 'json'}, {len(_albums)})",
+              index_mod._dumps_payload(_meta, index_mod._dumps(_albums))
+              == index_mod._dumps({"meta": _meta, "albums": _albums}))
+index_mod.orjson = _orjson
+
+# Non-str dict keys and >64-bit ints serialise like stdlib json, not crash
+_odd = {"extra": {1: "a", 2.5: "b"}, "big": 2 ** 70}
+check("index: _dumps handles int keys and big ints",
+      index_mod._dumps(_odd) == json.dumps(_odd, ensure_ascii=False, indent=2).encode())
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# FETCHER CACHE TESTS
+# ═══════════════════════════════════════════════════════════════════════════════
+print("\n── Fetcher cache ──")
+
+os.environ["CACHE_DIR"] = str(Path(tempfile.mkdtemp()) / "cache")
+import fetcher
+
+_cp = fetcher._cache_path("https://example.com/page/")
+fetcher._cache_write(_cp, "héllo " * 1000)
+check("fetcher: cache round-trip", fetcher._cache_read(_cp) == "héllo " * 1000)
+_gz = _cp.read_bytes()
+_cp.write_bytes(_gz[:10] + b"\xff" * 16 + _gz[26:])   # corrupt deflate stream
+check("fetcher: corrupt cache entry reads as empty", fetcher._cache_read(_cp) == "")
+_cp.write_bytes(_gz[: len(_gz) // 2])                 # truncated
+check("fetcher: truncated cache entry reads as empty", fetcher._cache_read(_cp) == "")
+_cp.write_bytes(b"not gzip at all")
+check("fetcher: non-gzip cache entry reads as empty", fetcher._cache_read(_cp) == "")
+
+_retry = fetcher._session.get_adapter("https://example.com").max_retries
+check("fetcher: adapter leaves 429/503/5xx to callers",
+      not any(_retry.is_retry("GET", code, has_retry_after=True)
+              for code in (429, 500, 502, 503, 504)))
+# A 304 for a cached CF interstitial must not be served; refetch in full
+class _Resp:
+    def __init__(self, status, text="", headers=None):
+        self.status_code, self.text, self.headers = status, text, headers or {}
+        self.content = text.encode()
+
+_url = "https://example.com/revalidate/"
+_cp = fetcher._cache_path(_url)
+fetcher._cache_write(_cp, "<title>Just a moment...</title>")
+fetcher._cache_write_meta(_cp, {"ETag": '"old"'})
+os.utime(_cp, (0, 0))   # expired, so fetch_plain revalidates
+_real_get = fetcher._session.get
+fetcher._session.get = lambda url, headers=None, **kw: (
+    _Resp(304) if "If-None-Match" in headers else _Resp(200, "real page " * 500)
+)
+try:
+    _body = fetcher.fetch_plain(_url, retries=1)
+finally:
+    fetcher._session.get = _real_get
+check("fetcher: 304 over a bad cache entry refetches in the same attempt",
+      (_body or "").startswith("real page"))
+
+class _Scraper:
+    def get(self, url, headers=None, **kw):
+        return _Resp(304) if headers and "If-None-Match" in headers else _Resp(200, "real page " * 500)
+
+fetcher._cache_write(_cp, "<title>Just a moment...</title>")
+fetcher._cache_write_meta(_cp, {"ETag": '"old"'})
+os.utime(_cp, (0, 0))
+fetcher._cs_session = _Scraper()
+try:
+    _body = fetcher.fetch_cloudscraper(_url, retries=1)
+finally:
+    fetcher._cs_session = None
+check("fetcher: cloudscraper 304 over a bad entry refetches in the same attempt",
+      (_body or "").startswith("real page"))
+
+# Tier memory: plain misses (404s) never retire a tier; repeated CF blocks do
+for _ in range(3):
+    fetcher._tier_record("miss.test", "plain", ok=False, blocked=False)
+check("fetcher: 404s don't mark a tier dead", not fetcher._tier_dead("miss.test", "plain"))
+for _ in range(2):
+    fetcher._tier_record("cf.test", "plain", ok=False, blocked=True)
+check("fetcher: repeated CF blocks mark a tier dead", fetcher._tier_dead("cf.test", "plain"))
+
+# Browser clearance reaches a cloudscraper session even if none existed yet
+class _Ctx:
+    def cookies(self):
+        return [{"name": "cf_clearance", "value": "ok", "domain": ".cf.test", "path": "/"}]
+
+fetcher._cs_session = None
+for _ in range(2):
+    fetcher._tier_record("cf.test", "cs", ok=False, blocked=True)
+fetcher._share_browser_cookies(_Ctx(), "cf.test")
+check("fetcher: browser cookies reach a new cloudscraper session",
+      fetcher._cs_session is not None
+      and fetcher._cs_session.cookies.get("cf_clearance") == "ok")
+check("fetcher: cookie hand-off revives the cloudscraper tier",
+      not fetcher._tier_dead("cf.test", "cs"))
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# PROCESSOR TESTS
+# ═══════════════════════════════════════════════════════════════════════════════
+print("\n── Processor ──")
+
+from datetime import datetime
+from processor import parse_date
+
+
+def _strptime_or_min(value):
+    try:
+        return datetime.strptime(value, "%Y-%m-%d")
+    except Exception:
+        return datetime.min
+
+
+_dates = ["2024-01-02", "2024-1-2", "2024-W01-1", "2024-13-01", "20240102",
+          "２０２４-01-02", "2024-01-02T00:00:00", "", None, ["x"]]
+_mismatch = [d for d in _dates if parse_date(d) != _strptime_or_min(d)]
+check("processor: parse_date accepts exactly what strptime did",
+      not _mismatch, f"differs for {_mismatch}" if _mismatch else "")
+
+
 # ═══════════════════════════════════════════════════════════════════════════════
 # FAPELLO PARSER TESTS
 # ═══════════════════════════════════════════════════════════════════════════════